@@ -15,10 +15,6 @@ if __name__ == "__main__":
     car = AISmartCar()
     try:
         car.start()
-    except KeyboardInterrupt:
-        print("\nKeyboard interrupt received. Shutting down...")
-        car.stop()
-        sys.exit(0)
     except Exception as e:
         print(f"Error in main application: {e}")
         car.stop()
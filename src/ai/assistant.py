@@ -6,23 +6,100 @@ AI Assistant Module for AI Smart Car
 This module handles voice recognition and AI processing.
 """
 
-import os
-import time
+import io
+import re
+import functools
+import queue
+import random
 import logging
 import threading
-import base64
-import tempfile
+import binascii
 import json
-import langid
-import numpy as np
-from transformers import pipeline
+from concurrent.futures import Future
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Command keywords in priority order, mapped to their response keys
+_COMMAND_KEYWORDS = (
+    ("move forward", "forward"),
+    ("go forward", "forward"),
+    ("move backward", "backward"),
+    ("go backward", "backward"),
+    ("turn left", "left"),
+    ("turn right", "right"),
+    ("stop", "stop"),
+    ("status", "status"),
+    ("picture", "picture"),
+    ("photo", "picture"),
+    ("see", "see"),
+    ("joke", "joke"),
+)
+
+# Keyword -> (priority, response key)
+_COMMAND_LOOKUP = {
+    keyword: (priority, key) for priority, (keyword, key) in enumerate(_COMMAND_KEYWORDS)
+}
+
+# Single-pass scanner for all keywords; the lookahead also reports overlapping matches
+_COMMAND_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword, _ in _COMMAND_KEYWORDS) + "))"
+)
+
+@functools.lru_cache(maxsize=256)
+def _match_command(text_norm):
+    """Find the highest-priority command in normalized text.
+    
+    Args:
+        text_norm (str): The stripped, lowercased text.
+    
+    Returns:
+        str: The response key, or "unknown" if no command matches.
+    """
+    matches = [_COMMAND_LOOKUP[m.group(1)] for m in _COMMAND_PATTERN.finditer(text_norm)]
+    if not matches:
+        return "unknown"
+    
+    _, key = min(matches)
+    return key
+
+# Common commands returned by the simulated transcription
+_SIMULATED_COMMANDS = (
+    "Move forward",
+    "Move backward",
+    "Turn left",
+    "Turn right",
+    "Stop",
+    "What is your status?",
+    "Take a picture",
+    "What do you see?",
+    "Tell me a joke"
+)
+
+_JOKES = (
+    "Why don't scientists trust atoms? Because they make up everything!",
+    "Why did the robot go on vacation? To recharge its batteries!",
+    "How many programmers does it take to change a light bulb? None, that's a hardware problem!",
+    "Why did the computer keep sneezing? It had a virus!",
+    "What do you call a computer that sings? A Dell!"
+)
+
 class AIAssistant:
     """AI Assistant for voice recognition and AI processing."""
     
+    # Canned responses for the simulated language model
+    _RESPONSES = {
+        "forward": "Moving forward.",
+        "backward": "Moving backward.",
+        "left": "Turning left.",
+        "right": "Turning right.",
+        "stop": "Stopping.",
+        "status": "All systems are operational.",
+        "picture": "Taking a picture.",
+        "see": "I can see the environment through my camera.",
+        "unknown": "I'm sorry, I don't understand that command."
+    }
+    
     def __init__(self, speech_engine):
         """Initialize the AI assistant.
         
@@ -37,6 +114,7 @@ class AIAssistant:
         # AI state
         self.running = False
         self.ai_thread = None
+        self._voice_queue = queue.Queue()
         
         # Initialize the voice recognition model
         self._init_voice_recognition()
@@ -51,13 +129,14 @@ class AIAssistant:
         logger.info("Initializing voice recognition model...")
         
         try:
-            # In a real implementation, this would initialize the Whisper model
+            # In a real implementation, this would import and initialize the Whisper model here,
+            # keeping the heavy import off the module load path
             # For simulation purposes, we'll just log the initialization
             self.voice_recognition_model = None
             
             logger.info("Voice recognition model initialized.")
         except Exception as e:
-            logger.error(f"Error initializing voice recognition model: {e}")
+            logger.error("Error initializing voice recognition model: %s", e)
             self.voice_recognition_model = None
     
     def _init_language_model(self):
@@ -65,7 +144,8 @@ class AIAssistant:
         logger.info("Initializing language model...")
         
         try:
-            # In a real implementation, this would initialize the DeepSeekR1 model
+            # In a real implementation, this would import transformers and initialize the
+            # DeepSeekR1 model here, keeping the heavy import off the module load path
             # For simulation purposes, we'll just log the initialization
             self.language_model = None
             
@@ -74,7 +154,7 @@ class AIAssistant:
             # Announce that the AI is ready
             self.speech_engine.speak("Hello, I am ready")
         except Exception as e:
-            logger.error(f"Error initializing language model: {e}")
+            logger.error("Error initializing language model: %s", e)
             self.language_model = None
     
     def start(self):
@@ -102,6 +182,9 @@ class AIAssistant:
         logger.info("Stopping AI assistant...")
         self.running = False
         
+        # Wake the AI loop so it can notice it should stop
+        self._voice_queue.put(None)
+        
         # Wait for the AI thread to finish
         if self.ai_thread:
             self.ai_thread.join(timeout=1.0)
@@ -113,17 +196,65 @@ class AIAssistant:
         logger.info("AI loop started.")
         
         while self.running:
-            # In a real implementation, this would process incoming voice commands
-            # For simulation purposes, we'll just sleep
-            time.sleep(0.1)
+            # Block until a voice command is submitted
+            item = self._voice_queue.get()
+            if item is None:
+                continue
+            
+            audio_data, future = item
+            
+            # Skip requests whose caller has already given up (e.g. a cancelled handler)
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            # One bad request must not end the loop and leave later callers waiting
+            try:
+                future.set_result(self.process_voice(audio_data))
+            except Exception as e:
+                logger.error("Error processing voice input: %s", e)
+                future.set_exception(e)
+        
+        # Fail anything still queued so no caller waits forever
+        try:
+            while True:
+                item = self._voice_queue.get_nowait()
+                if item is not None and item[1].set_running_or_notify_cancel():
+                    item[1].set_result({
+                        "success": False,
+                        "error": "AI assistant is not running"
+                    })
+        except queue.Empty:
+            pass
         
         logger.info("AI loop stopped.")
     
+    def submit_voice(self, audio_data):
+        """Queue voice input for processing on the AI thread.
+        
+        Args:
+            audio_data (str): The base64-encoded audio data.
+        
+        Returns:
+            Future: Resolves to the result dict of process_voice.
+        """
+        future = Future()
+        
+        if not self.running:
+            logger.warning("AI assistant is not running.")
+            future.set_result({
+                "success": False,
+                "error": "AI assistant is not running"
+            })
+            return future
+        
+        self._voice_queue.put((audio_data, future))
+        return future
+    
     def process_voice(self, audio_data):
         """Process voice input.
         
         Args:
-            audio_data (str): The base64-encoded audio data.
+            audio_data (str or bytes): The base64-encoded audio data, optionally as a data URL.
         
         Returns:
             dict: A dictionary containing the result of the voice processing.
@@ -131,22 +262,22 @@ class AIAssistant:
         logger.info("Processing voice input...")
         
         try:
-            # Decode the base64 audio data
-            audio_bytes = base64.b64decode(audio_data)
+            # Strip a data URL prefix if the client sent one
+            if isinstance(audio_data, str) and audio_data.startswith("data:"):
+                audio_data = audio_data.split(",", 1)[-1]
             
-            # Save the audio data to a temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_file_path = temp_file.name
+            # Decode the base64 audio data (str or bytes) with the C decoder directly
+            audio_bytes = binascii.a2b_base64(audio_data)
             
-            # In a real implementation, this would use the Whisper model to transcribe the audio
+            # Keep the audio in memory; the transcription API takes a file-like object
+            audio_buf = io.BytesIO(audio_bytes)
+            audio_buf.name = "audio.wav"
+            
+            # In a real implementation, this would use the Whisper model to transcribe audio_buf
             # For simulation purposes, we'll just return a simulated transcription
             transcription = self._simulate_transcription()
             
-            # Clean up the temporary file
-            os.unlink(temp_file_path)
-            
-            logger.info(f"Transcription: {transcription}")
+            logger.info("Transcription: %s", transcription)
             
             # Process the transcription with the language model
             response = self._process_text(transcription)
@@ -160,7 +291,7 @@ class AIAssistant:
                 "response": response
             }
         except Exception as e:
-            logger.error(f"Error processing voice input: {e}")
+            logger.error("Error processing voice input: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -175,22 +306,8 @@ class AIAssistant:
         # In a real implementation, this would use the Whisper model to transcribe the audio
         # For simulation purposes, we'll just return a simulated transcription
         
-        # Simulate some common commands
-        commands = [
-            "Move forward",
-            "Move backward",
-            "Turn left",
-            "Turn right",
-            "Stop",
-            "What is your status?",
-            "Take a picture",
-            "What do you see?",
-            "Tell me a joke"
-        ]
-        
         # Return a random command
-        import random
-        return random.choice(commands)
+        return random.choice(_SIMULATED_COMMANDS)
     
     def process_text(self, text):
         """Process text input.
@@ -201,7 +318,7 @@ class AIAssistant:
         Returns:
             dict: A dictionary containing the result of the text processing.
         """
-        logger.info(f"Processing text input: {text}")
+        logger.info("Processing text input: %s", text)
         
         # Process the text with the language model
         response = self._process_text(text)
@@ -224,51 +341,18 @@ class AIAssistant:
         Returns:
             str: The response from the language model.
         """
-        logger.info(f"Processing text with language model: {text}")
+        logger.info("Processing text with language model: %s", text)
         
         # In a real implementation, this would use the DeepSeekR1 model to process the text
         # For simulation purposes, we'll just return a simulated response
         
-        # Check if the text is a command
-        text_lower = text.lower()
-        
-        if "move forward" in text_lower or "go forward" in text_lower:
-            return "Moving forward."
-        
-        elif "move backward" in text_lower or "go backward" in text_lower:
-            return "Moving backward."
-        
-        elif "turn left" in text_lower:
-            return "Turning left."
-        
-        elif "turn right" in text_lower:
-            return "Turning right."
-        
-        elif "stop" in text_lower:
-            return "Stopping."
-        
-        elif "status" in text_lower:
-            return "All systems are operational."
-        
-        elif "picture" in text_lower or "photo" in text_lower:
-            return "Taking a picture."
-        
-        elif "see" in text_lower:
-            return "I can see the environment through my camera."
+        # Look up the command, cached by normalized text; only the joke pick stays random
+        key = _match_command(text.strip().lower())
         
-        elif "joke" in text_lower:
-            jokes = [
-                "Why don't scientists trust atoms? Because they make up everything!",
-                "Why did the robot go on vacation? To recharge its batteries!",
-                "How many programmers does it take to change a light bulb? None, that's a hardware problem!",
-                "Why did the computer keep sneezing? It had a virus!",
-                "What do you call a computer that sings? A Dell!"
-            ]
-            import random
-            return random.choice(jokes)
+        if key == "joke":
+            return random.choice(_JOKES)
         
-        else:
-            return "I'm sorry, I don't understand that command."
+        return self._RESPONSES[key]
     
     def get_status(self):
         """Get the current status of the AI assistant.
@@ -7,10 +7,14 @@ This module handles the control of the robot's motors and movement.
 """
 
 import time
+import heapq
+import itertools
 import logging
 import threading
 import math
+from collections import namedtuple
 from enum import Enum
+import numpy as np
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,9 +27,26 @@ class Direction(Enum):
     RIGHT = "right"
     STOP = "stop"
 
+# Immutable snapshot of a single motor's state. A namedtuple is cheap to build in bulk
+# from the state arrays and provides _asdict() for get_status
+MotorState = namedtuple("MotorState", ["speed", "direction"])
+
 class RobotController:
     """Controller for the robot's motors and movement."""
     
+    # Motor order used by the motor state arrays
+    MOTOR_NAMES = ("front_left", "front_right", "rear_left", "rear_right")
+    FRONT_LEFT, FRONT_RIGHT, REAR_LEFT, REAR_RIGHT = range(len(MOTOR_NAMES))
+    
+    # Direction value -> (Direction, motor directions in MOTOR_NAMES order)
+    _DIRECTION_VECTORS = {
+        Direction.FORWARD.value: (Direction.FORWARD, (1, 1, 1, 1)),
+        Direction.BACKWARD.value: (Direction.BACKWARD, (-1, -1, -1, -1)),
+        Direction.LEFT.value: (Direction.LEFT, (-1, 1, -1, 1)),
+        Direction.RIGHT.value: (Direction.RIGHT, (1, -1, 1, -1)),
+        Direction.STOP.value: (Direction.STOP, (0, 0, 0, 0))
+    }
+    
     def __init__(self):
         """Initialize the robot controller."""
         logger.info("Initializing robot controller...")
@@ -44,6 +65,10 @@ class RobotController:
         self.running = False
         self.control_thread = None
         
+        # Pending timed actions as a heap of (deadline, sequence, callback), run by the control loop
+        self._deadlines = []
+        self._deadline_seq = itertools.count()
+        
         # Initialize motor drivers
         self._init_motors()
         
@@ -55,13 +80,9 @@ class RobotController:
         # For simulation purposes, we'll just log the initialization
         logger.info("Initializing motor drivers...")
         
-        # Simulated motor initialization
-        self.motors = {
-            "front_left": {"speed": 0, "direction": 1},
-            "front_right": {"speed": 0, "direction": 1},
-            "rear_left": {"speed": 0, "direction": 1},
-            "rear_right": {"speed": 0, "direction": 1}
-        }
+        # Simulated motor initialization, one array slot per motor in MOTOR_NAMES order
+        self._directions = np.ones(len(self.MOTOR_NAMES), dtype=np.int8)
+        self._speeds = np.zeros(len(self.MOTOR_NAMES))
         
         logger.info("Motor drivers initialized.")
     
@@ -103,12 +124,27 @@ class RobotController:
         """Main control loop for the robot."""
         logger.info("Control loop started.")
         
+        # Deadline of the next tick, advanced by a fixed period to avoid drift
+        next_tick = time.monotonic()
+        
         while self.running:
             # Apply PID control to maintain desired speed
             self._apply_pid_control()
             
-            # Sleep to maintain control frequency
-            time.sleep(0.01)  # 100 Hz control loop
+            # Run any timed actions that are due
+            now = time.monotonic()
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, _, callback = heapq.heappop(self._deadlines)
+                callback()
+            
+            # Sleep until the next tick to maintain control frequency
+            next_tick += 0.01  # 100 Hz control loop
+            sleep_for = next_tick - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            elif sleep_for < -0.05:
+                # Fell too far behind; skip the missed ticks instead of bursting to catch up
+                next_tick = time.monotonic()
         
         logger.info("Control loop stopped.")
     
@@ -117,21 +153,18 @@ class RobotController:
         # In a real implementation, this would read encoder feedback and apply PID control
         # For simulation purposes, we'll just simulate the PID control
         
-        # Simulate PID control for each motor
-        for motor_name, motor in self.motors.items():
-            # In a real implementation, this would read encoder feedback
-            # and calculate the error between desired and actual speed
-            
-            # For simulation, we'll just set the motor speed directly
-            motor["speed"] = self.current_speed * motor["direction"]
+        # In a real implementation, this would read encoder feedback
+        # and calculate the error between desired and actual speed
+        
+        # For simulation, we'll just set all motor speeds directly in one vector op
+        self._speeds[:] = self.current_speed * self._directions
     
     def _stop_motors(self):
         """Stop all motors."""
         logger.info("Stopping all motors...")
         
         # Set all motor speeds to 0
-        for motor in self.motors.values():
-            motor["speed"] = 0
+        self._speeds.fill(0)
         
         self.current_speed = 0.0
         self.current_direction = Direction.STOP
@@ -142,51 +175,46 @@ class RobotController:
         """Move the robot in the specified direction.
         
         Args:
-            direction (str): The direction to move (forward, backward, left, right, stop).
+            direction (str or Direction): The direction to move (forward, backward, left, right, stop).
             speed (float): The speed to move at (0.0 to 1.0).
             duration (float, optional): The duration to move for in seconds.
         
         Returns:
             dict: A dictionary containing the result of the movement command.
         """
-        # Validate direction
+        # Validate direction; accept Direction members as well as their string values
+        if isinstance(direction, Direction):
+            direction = direction.value
         try:
-            direction = Direction(direction)
-        except ValueError:
-            logger.error(f"Invalid direction: {direction}")
+            entry = self._DIRECTION_VECTORS.get(direction)
+        except TypeError:
+            entry = None
+        if entry is None:
+            logger.error("Invalid direction: %s", direction)
             return {"success": False, "error": f"Invalid direction: {direction}"}
         
+        direction, vector = entry
+        
         # Validate speed
         speed = max(0.0, min(1.0, speed))
         
-        logger.info(f"Moving {direction.value} at speed {speed}")
+        logger.info("Moving %s at speed %s", direction.value, speed)
         
         # Set the current direction and speed
         self.current_direction = direction
         self.current_speed = speed
         
         # Configure motor directions based on movement direction
-        if direction == Direction.FORWARD:
-            self._set_motor_directions(1, 1, 1, 1)
-        elif direction == Direction.BACKWARD:
-            self._set_motor_directions(-1, -1, -1, -1)
-        elif direction == Direction.LEFT:
-            self._set_motor_directions(-1, 1, -1, 1)
-        elif direction == Direction.RIGHT:
-            self._set_motor_directions(1, -1, 1, -1)
-        elif direction == Direction.STOP:
+        self._directions[:] = vector
+        if direction == Direction.STOP:
             self._stop_motors()
         
         # If duration is specified, stop after the specified duration
         if duration is not None:
-            def stop_after_duration():
-                time.sleep(duration)
-                self._stop_motors()
-            
-            # Start a timer to stop the motors after the specified duration
-            timer_thread = threading.Thread(target=stop_after_duration)
-            timer_thread.daemon = True
-            timer_thread.start()
+            heapq.heappush(
+                self._deadlines,
+                (time.monotonic() + duration, next(self._deadline_seq), self._stop_motors)
+            )
         
         return {
             "success": True,
@@ -195,20 +223,6 @@ class RobotController:
             "duration": duration
         }
     
-    def _set_motor_directions(self, front_left, front_right, rear_left, rear_right):
-        """Set the direction of each motor.
-        
-        Args:
-            front_left (int): Direction of the front left motor (1 or -1).
-            front_right (int): Direction of the front right motor (1 or -1).
-            rear_left (int): Direction of the rear left motor (1 or -1).
-            rear_right (int): Direction of the rear right motor (1 or -1).
-        """
-        self.motors["front_left"]["direction"] = front_left
-        self.motors["front_right"]["direction"] = front_right
-        self.motors["rear_left"]["direction"] = rear_left
-        self.motors["rear_right"]["direction"] = rear_right
-    
     def joystick_control(self, x, y):
         """Control the robot using joystick input.
         
@@ -217,43 +231,47 @@ class RobotController:
             y (float): The y-axis value of the joystick (-1.0 to 1.0).
         
         Returns:
-            dict: A dictionary containing the result of the joystick command.
+            dict: A dictionary containing the result of the joystick command,
+                with "changed" set if the direction or speed changed.
         """
         # Ensure x and y are within the valid range
         x = max(-1.0, min(1.0, x))
         y = max(-1.0, min(1.0, y))
         
+        previous = (self.current_direction, self.current_speed)
+        
         # Calculate the speed based on the distance from the center
-        speed = math.sqrt(x*x + y*y)
-        speed = min(1.0, speed)  # Ensure speed is not greater than 1.0
+        speed = min(1.0, math.hypot(x, y))  # Ensure speed is not greater than 1.0
         
         # If the joystick is centered (within a small deadzone), stop the robot
         if speed < 0.1:
-            return self.move(Direction.STOP.value)
-        
-        # Calculate the angle of the joystick
-        angle = math.atan2(y, x)
-        
-        # Determine the direction based on the angle
-        if -math.pi/4 <= angle <= math.pi/4:
-            # Right
-            direction = Direction.RIGHT.value
-            # Reduce speed for turning
-            speed *= 0.7
-        elif math.pi/4 < angle <= 3*math.pi/4:
-            # Forward
-            direction = Direction.FORWARD.value
-        elif -3*math.pi/4 <= angle < -math.pi/4:
-            # Backward
-            direction = Direction.BACKWARD.value
+            result = self.move(Direction.STOP.value)
         else:
-            # Left
-            direction = Direction.LEFT.value
-            # Reduce speed for turning
-            speed *= 0.7
+            # Determine the direction from the dominant axis
+            if abs(y) >= abs(x):
+                # Forward or backward
+                direction = Direction.FORWARD.value if y > 0 else Direction.BACKWARD.value
+            else:
+                # Right or left
+                direction = Direction.RIGHT.value if x > 0 else Direction.LEFT.value
+                # Reduce speed for turning
+                speed *= 0.7
+            
+            # Move the robot in the calculated direction and speed
+            result = self.move(direction, speed)
+        
+        # Let callers skip notifying clients when the input didn't change anything
+        result["changed"] = (self.current_direction, self.current_speed) != previous
+        return result
+    
+    @property
+    def motors(self):
+        """Snapshot of the motor states, indexed by FRONT_LEFT..REAR_RIGHT.
         
-        # Move the robot in the calculated direction and speed
-        return self.move(direction, speed)
+        Returns:
+            tuple: One MotorState per motor, in MOTOR_NAMES order.
+        """
+        return tuple(map(MotorState, self._speeds.tolist(), self._directions.tolist()))
     
     def get_status(self):
         """Get the current status of the robot.
@@ -265,5 +283,7 @@ class RobotController:
             "running": self.running,
             "direction": self.current_direction.value,
             "speed": self.current_speed,
-            "motors": self.motors
+            "motors": {
+                name: motor._asdict() for name, motor in zip(self.MOTOR_NAMES, self.motors)
+            }
         } 
\ No newline at end of file
@@ -13,13 +13,16 @@ import time
 import logging
 import threading
 import signal
+import asyncio
 from dotenv import load_dotenv
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
 
 # Add the src directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import components
-from src.web.app import create_app, socketio
+from src.web.app import create_app
 from src.control.robot import RobotController
 from src.vision.camera import CameraManager
 from src.ai.assistant import AIAssistant
@@ -52,12 +55,18 @@ class AISmartCar:
         self.speech = SpeechEngine()
         self.ai_assistant = AIAssistant(self.speech)
         
-        # Create Flask app
+        # Create the web app (Quart + SocketIO, ASGI)
         self.app = create_app(self.robot, self.camera, self.ai_assistant)
         
-        # Set up signal handlers
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+        # Event loop and trigger for the web server, set while it is serving
+        self._loop = None
+        self._shutdown = None
+        
+        # Set up signal handlers; this is the only shutdown path for SIGINT/SIGTERM,
+        # and signals can only be installed from the main thread (not when embedded)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.signal_handler)
+            signal.signal(signal.SIGTERM, self.signal_handler)
         
         logger.info("AI Smart Car initialized successfully.")
         
@@ -80,10 +89,22 @@ class AISmartCar:
         # Start the web server
         host = os.getenv('HOST', '0.0.0.0')
         port = int(os.getenv('PORT', 5000))
-        logger.info(f"Starting web server on {host}:{port}")
+        logger.info("Starting web server on %s:%s", host, port)
         
-        # Run the Flask app with SocketIO
-        socketio.run(self.app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+        # Serve the ASGI app with hypercorn; returns after a signal triggers shutdown
+        config = Config()
+        config.bind = [f"{host}:{port}"]
+        asyncio.run(self._serve(config))
+        self.stop()
+    
+    async def _serve(self, config):
+        """Run the web server on this thread's event loop until shutdown is triggered."""
+        self._loop = asyncio.get_running_loop()
+        self._shutdown = asyncio.Event()
+        try:
+            await serve(self.app, config, shutdown_trigger=self._shutdown.wait)
+        finally:
+            self._loop = None
     
     def stop(self):
         """Stop the AI Smart Car application."""
@@ -102,7 +123,11 @@ class AISmartCar:
     
     def signal_handler(self, sig, frame):
         """Handle signals for graceful shutdown."""
-        logger.info(f"Received signal {sig}, shutting down...")
+        logger.info("Received signal %s, shutting down...", sig)
+        if self._loop is not None:
+            # Let the server finish gracefully; start() stops the components afterwards
+            self._loop.call_soon_threadsafe(self._shutdown.set)
+            return
         self.stop()
         sys.exit(0)
 
@@ -112,6 +137,6 @@ if __name__ == "__main__":
     try:
         car.start()
     except Exception as e:
-        logger.error(f"Error in main application: {e}")
+        logger.error("Error in main application: %s", e)
         car.stop()
         sys.exit(1) 
\ No newline at end of file
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Metrics Module for AI Smart Car
+This module keeps lightweight counters for the video and control pipelines
+and renders them in the Prometheus text format.
+"""
+
+import time
+import contextlib
+from array import array
+
+# (name, type, help, sample suffixes) per metric family, in exposition order. Each
+# sample takes one counter slot, in order; summaries have a _sum and a _count sample.
+# Each counter is only ever written from one thread, so plain increments need no lock.
+_METRICS = (
+    ("camera_frames_captured_total", "counter", "Frames published by the capture thread.", ("",)),
+    ("camera_capture_failures_total", "counter", "Failed camera reads.", ("",)),
+    ("camera_frames_handed_off_total", "counter", "Frames handed from the capture thread to the event loop.", ("",)),
+    ("camera_frames_delivered_total", "counter", "Frames put on a streaming track's queue.", ("",)),
+    ("camera_frames_dropped_total", "counter", "Pending frames replaced by a newer one before being sent.", ("",)),
+    ("camera_handoff_backlog_max", "gauge", "Most frames ever handed off but not yet delivered.", ("",)),
+    ("webrtc_frames_sent_total", "counter", "Frames returned by the video track, including resends.", ("",)),
+    ("webrtc_frame_latency_microseconds", "summary", "Time from capture to the video track returning a new frame.", ("_sum", "_count")),
+    ("webrtc_offer_microseconds", "summary", "Time spent processing WebRTC offers.", ("_sum", "_count")),
+    ("joystick_input_microseconds", "summary", "Time spent applying joystick inputs.", ("_sum", "_count")),
+)
+
+_SLOTS = sum(len(suffixes) for *_, suffixes in _METRICS)
+
+(FRAMES_CAPTURED, CAPTURE_FAILURES, FRAMES_HANDED_OFF, FRAMES_DELIVERED, FRAMES_DROPPED,
+ HANDOFF_BACKLOG_MAX, FRAMES_SENT, FRAME_LATENCY_US, FRAME_LATENCY_SAMPLES, OFFER_US, OFFERS,
+ JOYSTICK_US, JOYSTICK_EVENTS) = range(_SLOTS)
+
+counters = array('Q', [0] * _SLOTS)
+
+@contextlib.contextmanager
+def timed(count_index, sum_index):
+    """Count one event and add its duration in microseconds.
+    
+    Args:
+        count_index (int): The counter for the number of events.
+        sum_index (int): The counter for the total duration.
+    """
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        counters[count_index] += 1
+        counters[sum_index] += (time.perf_counter_ns() - start) // 1000
+
+def render():
+    """Render all metrics in the Prometheus text exposition format.
+    
+    Returns:
+        str: The metrics text.
+    """
+    lines = []
+    values = iter(counters)
+    for name, kind, help_text, suffixes in _METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, value in zip(suffixes, values):
+            lines.append(f"{name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
\ No newline at end of file
@@ -8,14 +8,32 @@ This module handles text-to-speech functionality.
 
 import os
 import logging
+import functools
 import threading
-import time
+import queue
 import langid
 import pyttsx3
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=512)
+def _detect_lang(text):
+    """Detect the language of the given text.
+    
+    Args:
+        text (str): The text to classify.
+    
+    Returns:
+        str: The ISO 639-1 language code.
+    """
+    # Plain ASCII can't be Chinese, which is the only language we treat differently
+    if text.isascii():
+        return 'en'
+    
+    lang, _ = langid.classify(text)
+    return lang
+
 class SpeechEngine:
     """Speech engine for text-to-speech functionality."""
     
@@ -28,10 +46,10 @@ class SpeechEngine:
         self.volume = float(os.getenv('TTS_VOLUME', 1.0))  # Volume (0.0 to 1.0)
         
         # Speech state
-        self.speaking = False
-        self.speech_queue = []
+        self.speaking = threading.Event()
+        self.speech_queue = queue.SimpleQueue()
         self.speech_thread = None
-        self.speech_lock = threading.Lock()
+        self._last_rate = None
         
         # Initialize the TTS engine
         self._init_tts_engine()
@@ -39,74 +57,104 @@ class SpeechEngine:
         logger.info("Speech engine initialized.")
     
     def _init_tts_engine(self):
-        """Initialize the text-to-speech engine."""
+        """Initialize the text-to-speech engine.
+        
+        The engine is loaded on the speech thread so startup isn't held up by
+        pyttsx3 and voice enumeration; texts spoken before then just wait in the queue.
+        """
+        self.engine = None
+        
+        # Start the speech thread
+        self.speech_thread = threading.Thread(target=self._speech_loop)
+        self.speech_thread.daemon = True
+        self.speech_thread.start()
+    
+    def _load_tts_engine(self):
+        """Load the pyttsx3 engine and apply the current settings."""
         logger.info("Initializing TTS engine...")
         
         try:
             # Initialize pyttsx3
-            self.engine = pyttsx3.init()
+            engine = pyttsx3.init()
             
             # Set properties
-            self.engine.setProperty('rate', self.rate)
-            self.engine.setProperty('volume', self.volume)
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
             
             # Get available voices
-            voices = self.engine.getProperty('voices')
+            voices = engine.getProperty('voices')
             if voices:
                 # Set the default voice (usually the first one)
-                self.engine.setProperty('voice', voices[0].id)
+                engine.setProperty('voice', voices[0].id)
             
-            logger.info("TTS engine initialized successfully.")
+            self.engine = engine
             
-            # Start the speech thread
-            self.speech_thread = threading.Thread(target=self._speech_loop)
-            self.speech_thread.daemon = True
-            self.speech_thread.start()
+            logger.info("TTS engine initialized successfully.")
         except Exception as e:
-            logger.error(f"Error initializing TTS engine: {e}")
+            logger.error("Error initializing TTS engine: %s", e)
             self.engine = None
     
     def _speech_loop(self):
         """Main speech loop."""
+        self._load_tts_engine()
+        
         logger.info("Speech loop started.")
         
         while True:
-            # Check if there's anything in the speech queue
-            with self.speech_lock:
-                if self.speech_queue:
-                    # Get the next text to speak
-                    text = self.speech_queue.pop(0)
-                    self.speaking = True
-                else:
-                    self.speaking = False
-                    # Sleep for a short time before checking again
-                    time.sleep(0.1)
-                    continue
+            # Block until there's something to speak
+            text = self.speech_queue.get()
+            
+            # Drain anything else that queued up in the meantime
+            batch = [text]
+            try:
+                while True:
+                    batch.append(self.speech_queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            self.speaking.set()
             
             try:
-                # Speak the text
-                logger.info(f"Speaking: {text}")
-                
                 if self.engine:
-                    # Detect language
-                    lang, _ = langid.classify(text)
-                    
-                    # Adjust rate based on language
-                    if lang == 'zh':  # Chinese
-                        self.engine.setProperty('rate', self.rate * 0.8)
-                    else:
-                        self.engine.setProperty('rate', self.rate)
-                    
-                    # Speak the text
-                    self.engine.say(text)
-                    self.engine.runAndWait()
+                    self._speak_batch(batch)
                 else:
                     logger.warning("TTS engine is not initialized.")
             except Exception as e:
-                logger.error(f"Error speaking text: {e}")
+                logger.error("Error speaking text: %s", e)
             finally:
-                with self.speech_lock:
-                    self.speaking = False
+                self.speaking.clear()
+    
+    def _speak_batch(self, batch):
+        """Speak a batch of texts, grouped into runs that share a speaking rate.
+        
+        Args:
+            batch (list): The texts to speak, in order.
+        """
+        # Group consecutive texts that are spoken at the same rate
+        groups = []
+        for text in batch:
+            # Adjust rate based on language
+            if _detect_lang(text) == 'zh':  # Chinese
+                rate = self.rate * 0.8
+            else:
+                rate = self.rate
+            
+            if groups and groups[-1][0] == rate:
+                groups[-1][1].append(text)
+            else:
+                groups.append((rate, [text]))
+        
+        for rate, texts in groups:
+            # Set the rate only when it changes
+            if rate != self._last_rate:
+                self.engine.setProperty('rate', rate)
+                self._last_rate = rate
+            
+            # Queue the whole group and synthesize it in a single runAndWait
+            for text in texts:
+                logger.info("Speaking: %s", text)
+                self.engine.say(text)
+            self.engine.runAndWait()
     
     def speak(self, text):
         """Speak the given text.
@@ -117,11 +165,10 @@ class SpeechEngine:
         if not text:
             return
         
-        logger.info(f"Adding text to speech queue: {text}")
+        logger.info("Adding text to speech queue: %s", text)
         
         # Add the text to the speech queue
-        with self.speech_lock:
-            self.speech_queue.append(text)
+        self.speech_queue.put(text)
     
     def is_speaking(self):
         """Check if the speech engine is currently speaking.
@@ -129,8 +176,7 @@ class SpeechEngine:
         Returns:
             bool: True if the speech engine is speaking, False otherwise.
         """
-        with self.speech_lock:
-            return self.speaking
+        return self.speaking.is_set()
     
     def set_rate(self, rate):
         """Set the speaking rate.
@@ -138,9 +184,10 @@ class SpeechEngine:
         Args:
             rate (int): The speaking rate in words per minute.
         """
-        logger.info(f"Setting speaking rate to {rate}")
+        logger.info("Setting speaking rate to %s", rate)
         
         self.rate = rate
+        self._last_rate = None
         
         if self.engine:
             self.engine.setProperty('rate', rate)
@@ -151,7 +198,7 @@ class SpeechEngine:
         Args:
             volume (float): The speaking volume (0.0 to 1.0).
         """
-        logger.info(f"Setting speaking volume to {volume}")
+        logger.info("Setting speaking volume to %s", volume)
         
         # Ensure volume is within the valid range
         volume = max(0.0, min(1.0, volume))
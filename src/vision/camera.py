@@ -11,15 +11,135 @@ import time
 import logging
 import threading
 import json
+import fractions
+import functools
+import contextlib
+import weakref
 import cv2
 import numpy as np
 import asyncio
-from aiortc import MediaStreamTrack, RTCPeerConnection, RTCSessionDescription
-from aiortc.contrib.media import MediaBlackhole, MediaPlayer, MediaRecorder
+import av
+from av import VideoFrame
+from aiortc import MediaStreamTrack, RTCPeerConnection, RTCRtpSender, RTCSessionDescription
+from aiortc.codecs import h264
+from aiortc.contrib.media import MediaBlackhole, MediaPlayer, MediaRecorder, MediaRelay
+from aiortc.mediastreams import MediaStreamError
+from src.vision.v4l2 import V4L2Capture
+from src.vision.yuv import bgr_to_yuv420
+from src.utils import metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Repeated capture warnings are let through at most once per this many seconds
+CAPTURE_WARNING_INTERVAL = 5.0
+
+class _RateLimitFilter(logging.Filter):
+    """Logging filter that passes each distinct warning message at most once per interval."""
+    
+    def __init__(self, interval):
+        """Initialize the filter.
+        
+        Args:
+            interval (float): The minimum time between repeats of a message, in seconds.
+        """
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+    
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        
+        # Key on the unformatted message so repeats differing only in arguments are grouped
+        now = time.monotonic()
+        if now - self._last.get(record.msg, float("-inf")) < self.interval:
+            return False
+        self._last[record.msg] = now
+        return True
+
+# The capture loop can fail at the frame rate; keep it from flooding the log
+capture_logger = logging.getLogger(__name__ + ".capture")
+capture_logger.addFilter(_RateLimitFilter(CAPTURE_WARNING_INTERVAL))
+
+# RTP video clock
+VIDEO_CLOCK_RATE = 90000
+VIDEO_TIME_BASE = fractions.Fraction(1, VIDEO_CLOCK_RATE)
+
+# How long recv waits for a new frame before resending the newest one (or black)
+FRAME_TIMEOUT = 0.5
+
+def _create_h264_encoder_context(codec_name, width, height, bitrate, fps, gop_size):
+    """Create an H.264 encoder context like aiortc's, with our frame rate and keyframe interval.
+    
+    Args:
+        codec_name (str): The PyAV codec name (e.g. "h264_omx", "libx264").
+        width (int): The frame width in pixels.
+        height (int): The frame height in pixels.
+        bitrate (int): The target bitrate in bits per second.
+        fps (int): The stream frame rate.
+        gop_size (int): The maximum number of frames between keyframes.
+    
+    Returns:
+        tuple: The opened codec context, and whether the codec buffers output packets.
+    """
+    codec = av.CodecContext.create(codec_name, "w")
+    codec.width = width
+    codec.height = height
+    codec.bit_rate = bitrate
+    codec.pix_fmt = "yuv420p"
+    codec.framerate = fractions.Fraction(fps, 1)
+    codec.time_base = fractions.Fraction(1, fps)
+    codec.gop_size = gop_size
+    codec.options = {
+        "profile": "baseline",
+        "level": "31",
+        "tune": "zerolatency",
+        "preset": "ultrafast",
+        "bf": "0",  # No B-frames, so every frame can be sent as soon as it is encoded
+    }
+    codec.open()
+    return codec, codec_name == "h264_omx"
+
+def _h264_first(codec):
+    """Sort key that puts the browser-default H.264 profile first, then other H.264, then the rest."""
+    if codec.mimeType.lower() != "video/h264":
+        return 2
+    if (codec.parameters.get("packetization-mode") == "1"
+            and codec.parameters.get("profile-level-id") == "42e01f"):
+        return 0
+    return 1
+
+@functools.lru_cache(maxsize=None)
+def _preferred_video_codecs():
+    """The sender's video codecs in preference order, computed once.
+    
+    Returns:
+        tuple: RTCRtpCodecCapability entries, H.264 first.
+    """
+    return tuple(sorted(RTCRtpSender.getCapabilities("video").codecs, key=_h264_first))
+
+def _frame_planes(frame):
+    """Split an I420 frame into its Y, U and V planes.
+    
+    Args:
+        frame (numpy.ndarray): An I420 (H * 3 // 2, W) frame.
+    
+    Returns:
+        tuple: One (rows, bytes per row) array per plane.
+    """
+    # Y plane followed by the quarter-size U and V planes
+    height = frame.shape[0] * 2 // 3
+    width = frame.shape[1]
+    y_size = width * height
+    c_size = y_size // 4
+    flat = frame.reshape(-1)
+    return (
+        flat[:y_size].reshape(height, width),
+        flat[y_size:y_size + c_size].reshape(height // 2, width // 2),
+        flat[y_size + c_size:y_size + 2 * c_size].reshape(height // 2, width // 2)
+    )
+
 class VideoStreamTrack(MediaStreamTrack):
     """Video stream track for WebRTC streaming."""
     
@@ -33,27 +153,104 @@ class VideoStreamTrack(MediaStreamTrack):
         """
         super().__init__()
         self.camera = camera
-        self.frame_count = 0
+        self._start = None  # When the first frame was captured or sent, from time.monotonic_ns()
+        self._timestamp = -1  # pts of the last frame returned
+        self._sent_at = None  # When the last frame was returned, from time.monotonic()
+        
+        # Holds at most the newest captured frame, so a slow encoder never builds a backlog;
+        # subscribed on the first recv so frames aren't handed off before anyone streams
+        self._queue = None
     
-    async def recv(self):
-        """Receive a frame from the camera.
+    def _alloc_video_frame(self, planes):
+        """Allocate an I420 VideoFrame to match the given source planes.
+        
+        Args:
+            planes (tuple): The source planes from _frame_planes.
         
         Returns:
-            VideoFrame: The video frame.
+            tuple: The VideoFrame and a list of views onto its planes.
         """
-        from av import VideoFrame
+        height, width = planes[0].shape
+        video_frame = VideoFrame(width, height, "yuv420p")
+        
+        # Rows may be padded, so view each plane by line size and trim to the source width
+        plane_views = [
+            np.frombuffer(plane, dtype=np.uint8).reshape(plane.height, plane.line_size)[:, :src.shape[1]]
+            for plane, src in zip(video_frame.planes, planes)
+        ]
+        return video_frame, plane_views
+    
+    async def _pace(self):
+        """Wait until a frame period at the camera's frame rate has passed since the last frame."""
+        if self.readyState != "live":
+            raise MediaStreamError
+        
+        if self._sent_at is not None:
+            wait = self._sent_at + 1.0 / self.camera.fps - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+    
+    def _timestamp_for(self, when_ns):
+        """Return the RTP timestamp for a frame from when it was captured or sent.
         
-        # Get the current frame from the camera
-        frame = self.camera.get_current_frame()
+        Args:
+            when_ns (int): The frame's time, from time.monotonic_ns().
         
-        # Convert the frame to a VideoFrame
-        video_frame = VideoFrame.from_ndarray(frame, format="bgr24")
-        video_frame.pts = self.frame_count
-        video_frame.time_base = 1 / 30  # 30 FPS
+        Returns:
+            tuple: The pts and time base for the frame.
+        """
+        if self._start is None:
+            self._start = when_ns
+        pts = (when_ns - self._start) * VIDEO_CLOCK_RATE // 1_000_000_000
         
-        self.frame_count += 1
+        # Never repeat or step back, e.g. for a frame captured just before a resend went out
+        self._timestamp = max(pts, self._timestamp + 1)
+        return self._timestamp, VIDEO_TIME_BASE
+    
+    async def recv(self):
+        """Receive a frame from the camera.
+        
+        Returns:
+            VideoFrame: The video frame.
+        """
+        # Send no faster than the frame rate, then wait for a new frame if none is pending
+        await self._pace()
+        if self._queue is None:
+            self._queue = self.camera.subscribe_frames()
+        try:
+            await asyncio.wait_for(self._queue.get(), FRAME_TIMEOUT)
+            fresh = True
+        except asyncio.TimeoutError:
+            # The camera stalled or isn't running; resend the newest frame (or black)
+            fresh = False
+        
+        # Copy the newest frame into a new VideoFrame while the capture thread can't reuse its
+        # buffer; each is sent once and shared by every relayed viewer, so none is ever reused
+        with self.camera.locked_frame() as (frame, captured_ns):
+            planes = _frame_planes(frame)
+            video_frame, plane_views = self._alloc_video_frame(planes)
+            for view, src in zip(plane_views, planes):
+                np.copyto(view, src)
+        
+        # Stamp by capture time so pts keeps up with real time when the camera runs slower
+        # than the frame rate; resends are stamped with when they go out
+        now_ns = time.monotonic_ns()
+        video_frame.pts, video_frame.time_base = self._timestamp_for(
+            captured_ns if fresh and captured_ns is not None else now_ns)
+        self._sent_at = time.monotonic()
+        
+        metrics.counters[metrics.FRAMES_SENT] += 1
+        if fresh and captured_ns is not None:
+            metrics.counters[metrics.FRAME_LATENCY_US] += (now_ns - captured_ns) // 1000
+            metrics.counters[metrics.FRAME_LATENCY_SAMPLES] += 1
         
         return video_frame
+    
+    def stop(self):
+        """Stop the track and its frame delivery."""
+        if self._queue is not None:
+            self.camera.unsubscribe_frames(self._queue)
+        super().stop()
 
 class CameraManager:
     """Manager for the camera and video streaming."""
@@ -67,13 +264,26 @@ class CameraManager:
         self.frame_width = int(os.getenv('FRAME_WIDTH', 640))
         self.frame_height = int(os.getenv('FRAME_HEIGHT', 480))
         self.fps = int(os.getenv('FPS', 30))
+        self.keyframe_interval = int(os.getenv('KEYFRAME_INTERVAL', 30))  # Frames between keyframes
         
         # Camera state
         self.running = False
         self.camera = None
-        self.current_frame = None
+        self.capture_format = "bgr24"  # Format the camera delivers: "bgr24" (OpenCV) or "yuv420p" (V4L2)
+        self.pixel_format = "yuv420p"  # Format of published frames, as the encoder takes them
         self.camera_thread = None
         
+        # Latest frame, swapped under a lock; readers copy it out under the same lock. OpenCV
+        # frames are retrieved into a reused BGR buffer and converted into the back one of two
+        # reused I420 buffers, which no reader ever sees; V4L2 frames are published straight
+        # from the driver's own mmap buffers, each handed back only once it is no longer the front
+        self._frame_lock = threading.Lock()
+        self._front = None
+        self._front_ns = None  # When the front frame was published, from time.monotonic_ns()
+        self._bgr = None
+        self._bufs = None
+        self._write_idx = 0
+        
         # Servo gimbal parameters
         self.horizontal_angle = 80  # Initial horizontal angle (degrees)
         self.vertical_angle = 40    # Initial vertical angle (degrees)
@@ -84,10 +294,25 @@ class CameraManager:
         
         # WebRTC parameters
         self.peer_connections = set()
+        self.loop = None  # asyncio loop that runs the peer connections, set by the web app
+        self._frame_queues = weakref.WeakSet()  # One newest-frame queue per streaming track
+        
+        # One source track read once per frame and relayed to every peer connection,
+        # so extra viewers don't each pull and copy frames. The source exists only while
+        # there are viewers; stopping it ends the relay's read loop
+        self._relay = MediaRelay()
+        self._source = None
+        self._viewers = set()  # Relay proxies handed to peer connections
+        
+        # Configure the H.264 encoder (hardware via h264_omx when available)
+        self._init_encoder()
         
         # Initialize the camera
         self._init_camera()
         
+        # Shared I420 placeholder for when no frame is available
+        self._black_frame = self._make_black_frame()
+        
         # Initialize the servo gimbal
         self._init_servo_gimbal()
         
@@ -95,16 +320,11 @@ class CameraManager:
     
     def _init_camera(self):
         """Initialize the camera."""
-        logger.info(f"Initializing camera (index: {self.camera_index})...")
+        logger.info("Initializing camera (index: %s)...", self.camera_index)
         
         try:
-            # Open the camera
-            self.camera = cv2.VideoCapture(self.camera_index)
-            
-            # Set camera parameters
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
-            self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+            # Open the camera, preferring native YUV420 over V4L2 to OpenCV's BGR conversion
+            self.camera = self._open_v4l2() or self._open_opencv()
             
             # Read a test frame
             ret, frame = self.camera.read()
@@ -113,14 +333,65 @@ class CameraManager:
                 self.camera = None
                 return
             
+            # The camera may not honour the requested size; go by what it delivers,
+            # trimmed to even dimensions for 4:2:0 chroma
+            if self.capture_format == "bgr24":
+                self.frame_height = frame.shape[0] & ~1
+                self.frame_width = frame.shape[1] & ~1
+            
             # Initialize the current frame
-            self.current_frame = frame
+            self._publish_frame(frame)
             
             logger.info("Camera initialized successfully.")
         except Exception as e:
-            logger.error(f"Error initializing camera: {e}")
+            logger.error("Error initializing camera: %s", e)
             self.camera = None
     
+    def _open_v4l2(self):
+        """Open the camera for zero-copy YUV420 capture over V4L2.
+        
+        Returns:
+            V4L2Capture: The capture, or None if the device doesn't support it.
+        """
+        try:
+            camera = V4L2Capture(self.camera_index, self.frame_width, self.frame_height, self.fps)
+        except OSError as e:
+            logger.info("V4L2 YUV420 capture unavailable (%s), using OpenCV.", e)
+            return None
+        
+        # The driver may have picked a different size
+        self.frame_width = camera.width
+        self.frame_height = camera.height
+        self.capture_format = "yuv420p"
+        
+        logger.info("Using V4L2 YUV420 capture.")
+        return camera
+    
+    def _open_opencv(self):
+        """Open the camera through OpenCV, which delivers BGR frames.
+        
+        Returns:
+            cv2.VideoCapture: The capture.
+        """
+        camera = cv2.VideoCapture(self.camera_index)
+        
+        # Set camera parameters
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+        camera.set(cv2.CAP_PROP_FPS, self.fps)
+        
+        # Keep only the newest frame in the driver so reads are never stale
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        self.capture_format = "bgr24"
+        return camera
+    
+    def _init_encoder(self):
+        """Configure aiortc's H.264 encoder for this camera's frame rate and keyframe interval."""
+        h264.create_encoder_context = functools.partial(
+            _create_h264_encoder_context, fps=self.fps, gop_size=self.keyframe_interval
+        )
+    
     def _init_servo_gimbal(self):
         """Initialize the servo gimbal."""
         logger.info("Initializing servo gimbal...")
@@ -168,43 +439,211 @@ class CameraManager:
             self.camera.release()
             self.camera = None
         
-        # Close all peer connections
-        for pc in self.peer_connections:
-            pc.close()
+        # Close any peer connections still open, if the loop that owns them is running
+        # in another thread (the web app normally closes them before its loop exits)
+        if self.loop and self.loop.is_running() and self.peer_connections:
+            future = asyncio.run_coroutine_threadsafe(self.close_peer_connections(), self.loop)
+            try:
+                future.result(timeout=1.0)
+            except Exception as e:
+                logger.error("Error closing peer connections: %s", e)
         self.peer_connections.clear()
         
         logger.info("Camera manager stopped.")
     
+    async def close_peer_connections(self):
+        """Close all peer connections; must run on the loop that owns them."""
+        pcs = list(self.peer_connections)
+        self.peer_connections.clear()
+        for pc in pcs:
+            try:
+                await pc.close()
+            except Exception as e:
+                logger.error("Error closing peer connection: %s", e)
+        
+        for viewer in list(self._viewers):
+            self._remove_viewer(viewer)
+    
+    def _add_viewer(self):
+        """Subscribe a new viewer to the shared video track, starting it if needed.
+        
+        Returns:
+            MediaStreamTrack: The relay proxy to add to a peer connection.
+        """
+        if self._source is None:
+            self._source = VideoStreamTrack(self)
+        
+        # Unbuffered, so a slow viewer skips to the newest frame instead of queueing
+        viewer = self._relay.subscribe(self._source, buffered=False)
+        self._viewers.add(viewer)
+        return viewer
+    
+    def _remove_viewer(self, viewer):
+        """Stop a viewer's relay proxy, and the shared video track if it was the last one.
+        
+        Args:
+            viewer (MediaStreamTrack): A proxy from _add_viewer.
+        """
+        if viewer not in self._viewers:
+            return
+        
+        self._viewers.discard(viewer)
+        viewer.stop()
+        
+        if not self._viewers and self._source is not None:
+            # Ends the relay's read loop and unsubscribes the source's frame queue
+            self._source.stop()
+            self._source = None
+    
     def _camera_loop(self):
         """Main camera loop."""
         logger.info("Camera loop started.")
         
         while self.running:
-            if self.camera:
-                # Read a frame from the camera
-                ret, frame = self.camera.read()
+            # grab() blocks until the camera delivers the next frame, so it paces the loop
+            grabbed = self.camera.grab() if self.camera else False
+            if grabbed is None:
+                # V4L2 had no frame ready before its timeout; check running and wait again
+                continue
+            if grabbed:
+                ret, frame = self._retrieve_frame()
                 if ret:
-                    # Update the current frame
-                    self.current_frame = frame
-                else:
-                    logger.warning("Failed to read from camera.")
+                    # Replace the current frame; older frames are simply dropped
+                    self._publish_frame(frame)
+                    if self.capture_format == "yuv420p":
+                        # The old V4L2 buffer is no longer the front, so the driver may refill it
+                        self.camera.release_previous()
+                    continue
+            
+            capture_logger.warning("Failed to read from camera.")
+            metrics.counters[metrics.CAPTURE_FAILURES] += 1
             
-            # Sleep to maintain frame rate
+            # Back off before retrying so a dead camera doesn't spin
             time.sleep(1.0 / self.fps)
         
         logger.info("Camera loop stopped.")
     
     def get_current_frame(self):
-        """Get the current frame from the camera.
+        """Get a copy of the current frame from the camera.
         
         Returns:
-            numpy.ndarray: The current frame.
+            numpy.ndarray: The current (H * 3 // 2, W) I420 frame.
+        """
+        with self.locked_frame() as (frame, _):
+            return frame.copy()
+    
+    @contextlib.contextmanager
+    def locked_frame(self):
+        """Hold the current frame so the capture thread can't replace or overwrite it.
+        
+        Keep the block short; capture waits for it to exit before publishing.
+        
+        Yields:
+            tuple: The current I420 frame (black if none is available) and when it was
+                published in monotonic ns (None for the black frame).
         """
-        if self.current_frame is None:
-            # Return a black frame if no frame is available
-            return np.zeros((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        with self._frame_lock:
+            if self._front is None:
+                yield self._black_frame, None
+            else:
+                yield self._front, self._front_ns
+    
+    def _retrieve_frame(self):
+        """Retrieve the grabbed frame, decoding OpenCV frames straight into the reused BGR buffer.
         
-        return self.current_frame
+        Returns:
+            tuple: (success, frame).
+        """
+        if self.capture_format == "bgr24" and self._bgr is not None:
+            return self.camera.retrieve(self._bgr)
+        
+        return self.camera.retrieve()
+    
+    def _publish_frame(self, frame):
+        """Make a newly captured frame the current one.
+        
+        Args:
+            frame (numpy.ndarray): The captured frame, in capture_format.
+        """
+        if self.capture_format == "bgr24":
+            # Reuse the BGR frame as the next retrieve target
+            if self._bgr is None or self._bgr.shape != frame.shape:
+                self._bgr = np.empty_like(frame)
+            
+            # Convert into the back buffer, then swap it to the front
+            height = frame.shape[0] & ~1
+            width = frame.shape[1] & ~1
+            if self._bufs is None or self._bufs[0].shape != (height * 3 // 2, width):
+                self._bufs = [np.empty((height * 3 // 2, width), dtype=np.uint8) for _ in range(2)]
+            buf = self._bufs[self._write_idx]
+            bgr_to_yuv420(frame[:height, :width], *_frame_planes(buf))
+            frame = buf
+        
+        captured_ns = time.monotonic_ns()
+        with self._frame_lock:
+            self._front = frame
+            self._front_ns = captured_ns
+            self._write_idx = 1 - self._write_idx
+        metrics.counters[metrics.FRAMES_CAPTURED] += 1
+        
+        # Tell the streaming tracks on their loop that a new frame is available
+        if self.loop is not None and self._frame_queues:
+            metrics.counters[metrics.FRAMES_HANDED_OFF] += 1
+            try:
+                self.loop.call_soon_threadsafe(self._deliver_frame, captured_ns)
+            except RuntimeError:
+                # The loop has shut down; nobody is streaming any more
+                pass
+    
+    def subscribe_frames(self):
+        """Create a queue that is notified of each newly captured frame, keeping only the newest.
+        
+        Readers then take the frame itself through locked_frame().
+        
+        Returns:
+            asyncio.Queue: The frame queue, of capture times in monotonic ns.
+        """
+        queue = asyncio.Queue(maxsize=1)
+        self._frame_queues.add(queue)
+        return queue
+    
+    def unsubscribe_frames(self, queue):
+        """Stop delivering frames to a queue from subscribe_frames.
+        
+        Args:
+            queue (asyncio.Queue): The frame queue.
+        """
+        self._frame_queues.discard(queue)
+    
+    def _deliver_frame(self, captured_ns):
+        """Notify every track's queue of a new frame, dropping the one it replaces. Runs on the loop.
+        
+        Args:
+            captured_ns (int): When the frame was published, from time.monotonic_ns().
+        """
+        counters = metrics.counters
+        backlog = counters[metrics.FRAMES_HANDED_OFF] - counters[metrics.FRAMES_DELIVERED]
+        if backlog > counters[metrics.HANDOFF_BACKLOG_MAX]:
+            counters[metrics.HANDOFF_BACKLOG_MAX] = backlog
+        counters[metrics.FRAMES_DELIVERED] += 1
+        
+        for queue in list(self._frame_queues):
+            if queue.full():
+                queue.get_nowait()
+                counters[metrics.FRAMES_DROPPED] += 1
+            queue.put_nowait(captured_ns)
+    
+    def _make_black_frame(self):
+        """Create a read-only black I420 frame at the current size.
+        
+        Returns:
+            numpy.ndarray: The black frame.
+        """
+        frame = np.zeros((self.frame_height * 3 // 2, self.frame_width), dtype=np.uint8)
+        frame[self.frame_height:] = 128  # Neutral chroma
+        
+        frame.setflags(write=False)
+        return frame
     
     async def process_offer(self, offer):
         """Process a WebRTC offer.
@@ -221,23 +660,38 @@ class CameraManager:
         pc = RTCPeerConnection()
         self.peer_connections.add(pc)
         
+        # Add a relayed view of the shared video track
+        viewer = self._add_viewer()
+        pc.addTrack(viewer)
+        
         @pc.on("connectionstatechange")
         async def on_connectionstatechange():
-            logger.info(f"Connection state changed to {pc.connectionState}")
+            logger.info("Connection state changed to %s", pc.connectionState)
             if pc.connectionState == "failed" or pc.connectionState == "closed":
                 self.peer_connections.discard(pc)
+                self._remove_viewer(viewer)
         
-        # Add the video track
-        pc.addTrack(VideoStreamTrack(self))
+        # Prefer H.264 so the SoC's hardware encoder can be used instead of software VP8
+        codecs = _preferred_video_codecs()
+        for transceiver in pc.getTransceivers():
+            if transceiver.kind == "video":
+                transceiver.setCodecPreferences(codecs)
         
-        # Set the remote description
-        await pc.setRemoteDescription(
-            RTCSessionDescription(sdp=offer["sdp"], type=offer["type"])
-        )
-        
-        # Create an answer
-        answer = await pc.createAnswer()
-        await pc.setLocalDescription(answer)
+        try:
+            # Set the remote description
+            await pc.setRemoteDescription(
+                RTCSessionDescription(sdp=offer["sdp"], type=offer["type"])
+            )
+            
+            # Create an answer
+            answer = await pc.createAnswer()
+            await pc.setLocalDescription(answer)
+        except Exception:
+            # Don't leave a dead connection holding a viewer (and the source track) open
+            self.peer_connections.discard(pc)
+            self._remove_viewer(viewer)
+            await pc.close()
+            raise
         
         logger.info("WebRTC offer processed.")
         
@@ -257,20 +711,24 @@ class CameraManager:
         Returns:
             dict: A dictionary containing the result of the control command.
         """
-        logger.info(f"Camera control: {action} = {value}")
+        logger.debug("Camera control: %s = %s", action, value)
         
         if action == "horizontal":
-            # Set the horizontal angle
-            self.set_horizontal_angle(value)
-            return {"success": True, "horizontal_angle": self.horizontal_angle}
+            # Clamp and set the horizontal angle inline; this path runs per control message
+            angle = min(max(value, self.horizontal_min), self.horizontal_max)
+            self.horizontal_angle = angle
+            logger.debug("hservo=%s", angle)
+            return {"success": True, "horizontal_angle": angle}
         
         elif action == "vertical":
-            # Set the vertical angle
-            self.set_vertical_angle(value)
-            return {"success": True, "vertical_angle": self.vertical_angle}
+            # Clamp and set the vertical angle inline; this path runs per control message
+            angle = min(max(value, self.vertical_min), self.vertical_max)
+            self.vertical_angle = angle
+            logger.debug("vservo=%s", angle)
+            return {"success": True, "vertical_angle": angle}
         
         else:
-            logger.error(f"Unknown camera control action: {action}")
+            logger.error("Unknown camera control action: %s", action)
             return {"success": False, "error": f"Unknown action: {action}"}
     
     def set_horizontal_angle(self, angle):
@@ -278,30 +736,38 @@ class CameraManager:
         
         Args:
             angle (float): The horizontal angle in degrees.
+        
+        Returns:
+            float: The angle actually set, after clamping to the valid range.
         """
         # Ensure the angle is within the valid range
-        angle = max(self.horizontal_min, min(self.horizontal_max, angle))
+        angle = min(max(angle, self.horizontal_min), self.horizontal_max)
         
         # Set the horizontal angle
         self.horizontal_angle = angle
         
         # In a real implementation, this would control the servo
-        logger.info(f"Set horizontal angle to {angle} degrees.")
+        logger.debug("hservo=%s", angle)
+        return angle
     
     def set_vertical_angle(self, angle):
         """Set the vertical angle of the camera gimbal.
         
         Args:
             angle (float): The vertical angle in degrees.
+        
+        Returns:
+            float: The angle actually set, after clamping to the valid range.
         """
         # Ensure the angle is within the valid range
-        angle = max(self.vertical_min, min(self.vertical_max, angle))
+        angle = min(max(angle, self.vertical_min), self.vertical_max)
         
         # Set the vertical angle
         self.vertical_angle = angle
         
         # In a real implementation, this would control the servo
-        logger.info(f"Set vertical angle to {angle} degrees.")
+        logger.debug("vservo=%s", angle)
+        return angle
     
     def joystick_control(self, x, y):
         """Control the camera gimbal using joystick input.
@@ -311,7 +777,8 @@ class CameraManager:
             y (float): The y-axis value of the joystick (-1.0 to 1.0).
         
         Returns:
-            dict: A dictionary containing the result of the joystick command.
+            dict: A dictionary containing the result of the joystick command,
+                with "changed" set if either angle moved (not stuck at a limit).
         """
         # Ensure x and y are within the valid range
         x = max(-1.0, min(1.0, x))
@@ -322,13 +789,15 @@ class CameraManager:
         vertical_delta = -y * 5.0   # 5 degrees per joystick unit (inverted)
         
         # Set the new angles
-        self.set_horizontal_angle(self.horizontal_angle + horizontal_delta)
-        self.set_vertical_angle(self.vertical_angle + vertical_delta)
+        previous = (self.horizontal_angle, self.vertical_angle)
+        horizontal = self.set_horizontal_angle(previous[0] + horizontal_delta)
+        vertical = self.set_vertical_angle(previous[1] + vertical_delta)
         
         return {
             "success": True,
-            "horizontal_angle": self.horizontal_angle,
-            "vertical_angle": self.vertical_angle
+            "changed": (horizontal, vertical) != previous,
+            "horizontal_angle": horizontal,
+            "vertical_angle": vertical
         }
     
     def get_status(self):
@@ -343,6 +812,7 @@ class CameraManager:
             "frame_width": self.frame_width,
             "frame_height": self.frame_height,
             "fps": self.fps,
+            "pixel_format": self.pixel_format,
             "horizontal_angle": self.horizontal_angle,
             "vertical_angle": self.vertical_angle
         } 
\ No newline at end of file
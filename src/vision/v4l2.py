@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+V4L2 Capture Module for AI Smart Car
+This module captures YUV420 frames straight from a V4L2 device using mmap buffers.
+"""
+
+import os
+import time
+import errno
+import mmap
+import selectors
+import fcntl
+import ctypes
+import logging
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How long grab() waits for the device to signal a frame before giving up
+GRAB_TIMEOUT = 0.5
+
+# ioctl request encoding (asm-generic/ioctl.h)
+_IOC_WRITE = 1
+_IOC_READ = 2
+
+def _IOC(direction, nr, struct):
+    return (direction << 30) | (ctypes.sizeof(struct) << 16) | (ord('V') << 8) | nr
+
+def _IOR(nr, struct):
+    return _IOC(_IOC_READ, nr, struct)
+
+def _IOW(nr, struct):
+    return _IOC(_IOC_WRITE, nr, struct)
+
+def _IOWR(nr, struct):
+    return _IOC(_IOC_READ | _IOC_WRITE, nr, struct)
+
+def _fourcc(code):
+    return ord(code[0]) | (ord(code[1]) << 8) | (ord(code[2]) << 16) | (ord(code[3]) << 24)
+
+V4L2_PIX_FMT_YUV420 = _fourcc('YU12')
+V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+V4L2_MEMORY_MMAP = 1
+V4L2_FIELD_NONE = 1
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_STREAMING = 0x04000000
+
+# Structures from linux/videodev2.h
+class v4l2_capability(ctypes.Structure):
+    _fields_ = [
+        ('driver', ctypes.c_uint8 * 16),
+        ('card', ctypes.c_uint8 * 32),
+        ('bus_info', ctypes.c_uint8 * 32),
+        ('version', ctypes.c_uint32),
+        ('capabilities', ctypes.c_uint32),
+        ('device_caps', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 3),
+    ]
+
+class v4l2_pix_format(ctypes.Structure):
+    _fields_ = [
+        ('width', ctypes.c_uint32),
+        ('height', ctypes.c_uint32),
+        ('pixelformat', ctypes.c_uint32),
+        ('field', ctypes.c_uint32),
+        ('bytesperline', ctypes.c_uint32),
+        ('sizeimage', ctypes.c_uint32),
+        ('colorspace', ctypes.c_uint32),
+        ('priv', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('ycbcr_enc', ctypes.c_uint32),
+        ('quantization', ctypes.c_uint32),
+        ('xfer_func', ctypes.c_uint32),
+    ]
+
+class _v4l2_format_fmt(ctypes.Union):
+    _fields_ = [
+        ('pix', v4l2_pix_format),
+        ('raw_data', ctypes.c_uint8 * 200),
+        ('_align', ctypes.c_void_p),  # The kernel union holds pointers, so it is pointer-aligned
+    ]
+
+class v4l2_format(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('fmt', _v4l2_format_fmt),
+    ]
+
+class v4l2_fract(ctypes.Structure):
+    _fields_ = [
+        ('numerator', ctypes.c_uint32),
+        ('denominator', ctypes.c_uint32),
+    ]
+
+class v4l2_captureparm(ctypes.Structure):
+    _fields_ = [
+        ('capability', ctypes.c_uint32),
+        ('capturemode', ctypes.c_uint32),
+        ('timeperframe', v4l2_fract),
+        ('extendedmode', ctypes.c_uint32),
+        ('readbuffers', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32 * 4),
+    ]
+
+class _v4l2_streamparm_parm(ctypes.Union):
+    _fields_ = [
+        ('capture', v4l2_captureparm),
+        ('raw_data', ctypes.c_uint8 * 200),
+    ]
+
+class v4l2_streamparm(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('parm', _v4l2_streamparm_parm),
+    ]
+
+class v4l2_requestbuffers(ctypes.Structure):
+    _fields_ = [
+        ('count', ctypes.c_uint32),
+        ('type', ctypes.c_uint32),
+        ('memory', ctypes.c_uint32),
+        ('capabilities', ctypes.c_uint32),
+        ('reserved', ctypes.c_uint32),
+    ]
+
+class timeval(ctypes.Structure):
+    _fields_ = [
+        ('tv_sec', ctypes.c_long),
+        ('tv_usec', ctypes.c_long),
+    ]
+
+class v4l2_timecode(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('frames', ctypes.c_uint8),
+        ('seconds', ctypes.c_uint8),
+        ('minutes', ctypes.c_uint8),
+        ('hours', ctypes.c_uint8),
+        ('userbits', ctypes.c_uint8 * 4),
+    ]
+
+class _v4l2_buffer_m(ctypes.Union):
+    _fields_ = [
+        ('offset', ctypes.c_uint32),
+        ('userptr', ctypes.c_ulong),
+        ('planes', ctypes.c_void_p),
+        ('fd', ctypes.c_int32),
+    ]
+
+class v4l2_buffer(ctypes.Structure):
+    _fields_ = [
+        ('index', ctypes.c_uint32),
+        ('type', ctypes.c_uint32),
+        ('bytesused', ctypes.c_uint32),
+        ('flags', ctypes.c_uint32),
+        ('field', ctypes.c_uint32),
+        ('timestamp', timeval),
+        ('timecode', v4l2_timecode),
+        ('sequence', ctypes.c_uint32),
+        ('memory', ctypes.c_uint32),
+        ('m', _v4l2_buffer_m),
+        ('length', ctypes.c_uint32),
+        ('reserved2', ctypes.c_uint32),
+        ('request_fd', ctypes.c_int32),
+    ]
+
+VIDIOC_QUERYCAP = _IOR(0, v4l2_capability)
+VIDIOC_S_FMT = _IOWR(5, v4l2_format)
+VIDIOC_REQBUFS = _IOWR(8, v4l2_requestbuffers)
+VIDIOC_QUERYBUF = _IOWR(9, v4l2_buffer)
+VIDIOC_QBUF = _IOWR(15, v4l2_buffer)
+VIDIOC_DQBUF = _IOWR(17, v4l2_buffer)
+VIDIOC_STREAMON = _IOW(18, ctypes.c_int)
+VIDIOC_STREAMOFF = _IOW(19, ctypes.c_int)
+VIDIOC_S_PARM = _IOWR(22, v4l2_streamparm)
+
+class V4L2Capture:
+    """Zero-copy YUV420 (I420) capture from a V4L2 device using mmap buffers.
+    
+    Frames are NumPy views of shape (height * 3 // 2, width) straight into the
+    driver's buffers: the Y plane followed by the U and V planes. grab() keeps
+    the previously grabbed buffer out of the driver's hands, so a frame stays
+    valid until release_previous() is called after the next successful grab().
+    Callers that publish frames to readers must only release once the new
+    frame has replaced the old one.
+    """
+    
+    def __init__(self, device_index, width, height, fps, buffer_count=3):
+        """Open the device and start streaming.
+        
+        Args:
+            device_index (int): The N in /dev/videoN.
+            width (int): The requested frame width in pixels.
+            height (int): The requested frame height in pixels.
+            fps (int): The requested frame rate.
+            buffer_count (int): The number of mmap buffers to request.
+        
+        Raises:
+            OSError: If the device can't be opened or doesn't support YUV420 streaming.
+        """
+        # Non-blocking, so frames are waited for on the selector rather than inside DQBUF
+        self.fd = os.open(f"/dev/video{device_index}", os.O_RDWR | os.O_NONBLOCK)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.fd, selectors.EVENT_READ)
+        self._buffers = []
+        self._views = []
+        self._current = None
+        self._previous = None
+        self._streaming = False
+        
+        try:
+            self._configure(width, height, fps)
+            self._map_buffers(buffer_count)
+            
+            # Queue every buffer and start streaming
+            for index in range(len(self._buffers)):
+                self._queue(index)
+            fcntl.ioctl(self.fd, VIDIOC_STREAMON, ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE))
+            self._streaming = True
+        except Exception:
+            self.release()
+            raise
+    
+    def _configure(self, width, height, fps):
+        """Check capabilities and set the pixel format and frame rate."""
+        cap = v4l2_capability()
+        fcntl.ioctl(self.fd, VIDIOC_QUERYCAP, cap)
+        if not (cap.capabilities & V4L2_CAP_VIDEO_CAPTURE and cap.capabilities & V4L2_CAP_STREAMING):
+            raise OSError("Device does not support video capture streaming")
+        
+        fmt = v4l2_format()
+        fmt.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        fmt.fmt.pix.width = width
+        fmt.fmt.pix.height = height
+        fmt.fmt.pix.pixelformat = V4L2_PIX_FMT_YUV420
+        fmt.fmt.pix.field = V4L2_FIELD_NONE
+        fcntl.ioctl(self.fd, VIDIOC_S_FMT, fmt)
+        
+        # The driver may adjust the format; only unpadded YUV420 can be viewed directly
+        pix = fmt.fmt.pix
+        if pix.pixelformat != V4L2_PIX_FMT_YUV420:
+            raise OSError("Device does not support YUV420")
+        if pix.bytesperline != pix.width:
+            raise OSError(f"Padded YUV420 rows are not supported ({pix.bytesperline} != {pix.width})")
+        
+        self.width = pix.width
+        self.height = pix.height
+        
+        # The frame rate is best effort; not every driver supports it
+        parm = v4l2_streamparm()
+        parm.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        parm.parm.capture.timeperframe.numerator = 1
+        parm.parm.capture.timeperframe.denominator = fps
+        try:
+            fcntl.ioctl(self.fd, VIDIOC_S_PARM, parm)
+        except OSError as e:
+            logger.warning("Could not set V4L2 frame rate: %s", e)
+    
+    def _map_buffers(self, buffer_count):
+        """Request and mmap the driver's capture buffers."""
+        req = v4l2_requestbuffers()
+        req.count = buffer_count
+        req.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        req.memory = V4L2_MEMORY_MMAP
+        fcntl.ioctl(self.fd, VIDIOC_REQBUFS, req)
+        if req.count < 2:
+            raise OSError("Not enough V4L2 buffers")
+        
+        frame_size = self.width * self.height * 3 // 2
+        for index in range(req.count):
+            buf = v4l2_buffer()
+            buf.index = index
+            buf.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+            buf.memory = V4L2_MEMORY_MMAP
+            fcntl.ioctl(self.fd, VIDIOC_QUERYBUF, buf)
+            
+            mm = mmap.mmap(self.fd, buf.length, mmap.MAP_SHARED,
+                           mmap.PROT_READ | mmap.PROT_WRITE, offset=buf.m.offset)
+            self._buffers.append(mm)
+            self._views.append(
+                np.frombuffer(mm, dtype=np.uint8, count=frame_size).reshape(self.height * 3 // 2, self.width)
+            )
+    
+    def _queue(self, index):
+        """Hand a buffer back to the driver."""
+        buf = v4l2_buffer()
+        buf.index = index
+        buf.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+        buf.memory = V4L2_MEMORY_MMAP
+        fcntl.ioctl(self.fd, VIDIOC_QBUF, buf)
+    
+    def fileno(self):
+        """Return the device file descriptor."""
+        return self.fd
+    
+    def grab(self, timeout=GRAB_TIMEOUT):
+        """Wait for the next frame, holding on to the previously grabbed one.
+        
+        The previous buffer is not handed back to the driver until
+        release_previous(); one left unreleased from an earlier grab is
+        requeued here.
+        
+        Args:
+            timeout (float): The maximum time to wait for the device, in seconds.
+        
+        Returns:
+            bool or None: True if a frame was captured, None if no frame was ready
+                within the timeout (not an error; just grab again), False on failure.
+        """
+        try:
+            self.release_previous()
+            
+            buf = v4l2_buffer()
+            buf.type = V4L2_BUF_TYPE_VIDEO_CAPTURE
+            buf.memory = V4L2_MEMORY_MMAP
+            
+            deadline = time.monotonic() + timeout
+            while True:
+                # Sleep on the device fd until the driver has a filled buffer
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._selector.select(remaining):
+                    logger.debug("Timed out waiting for a V4L2 frame.")
+                    return None
+                
+                try:
+                    fcntl.ioctl(self.fd, VIDIOC_DQBUF, buf)
+                except OSError as e:
+                    if e.errno == errno.EAGAIN:
+                        # Woken without a frame ready; wait again
+                        continue
+                    raise
+                
+                self._previous, self._current = self._current, buf.index
+                return True
+        except OSError as e:
+            # Reported (rate limited) by the caller; this can repeat at the frame rate
+            logger.debug("V4L2 capture failed: %s", e)
+            return False
+    
+    def release_previous(self):
+        """Hand the buffer grabbed before the current one back to the driver.
+        
+        Call once nothing can still be reading the previous frame.
+        """
+        if self._previous is not None:
+            index, self._previous = self._previous, None
+            try:
+                self._queue(index)
+            except OSError as e:
+                logger.warning("Could not requeue V4L2 buffer: %s", e)
+    
+    def retrieve(self):
+        """Return the most recently grabbed frame.
+        
+        Returns:
+            tuple: (True, frame view) or (False, None) if nothing was grabbed.
+        """
+        if self._current is None:
+            return False, None
+        return True, self._views[self._current]
+    
+    def read(self, timeout=2.0):
+        """Grab and retrieve the next frame.
+        
+        Used for one-off reads such as a startup test frame, so it allows the
+        camera longer to warm up than grab() does by default.
+        
+        Args:
+            timeout (float): The maximum time to wait for the device, in seconds.
+        
+        Returns:
+            tuple: (True, frame view) or (False, None) on failure.
+        """
+        if not self.grab(timeout):
+            # Includes a timeout; a one-off read has nothing to retry with
+            return False, None
+        return self.retrieve()
+    
+    def release(self):
+        """Stop streaming and release the buffers and device."""
+        if self.fd is None:
+            return
+        
+        if self._streaming:
+            try:
+                fcntl.ioctl(self.fd, VIDIOC_STREAMOFF, ctypes.c_int(V4L2_BUF_TYPE_VIDEO_CAPTURE))
+            except OSError as e:
+                logger.warning("Error stopping V4L2 stream: %s", e)
+            self._streaming = False
+        
+        # Views must go before their mmaps can be closed
+        self._views = []
+        for mm in self._buffers:
+            try:
+                mm.close()
+            except BufferError:
+                # A consumer still holds a frame view; the mapping is freed with it
+                pass
+        self._buffers = []
+        
+        self._selector.close()
+        os.close(self.fd)
+        self.fd = None
\ No newline at end of file
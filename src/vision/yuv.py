@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+YUV Conversion Module for AI Smart Car
+This module converts captured BGR frames to the encoder's I420 (YUV420) layout.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+@njit(parallel=True, fastmath=True, cache=True)
+def bgr_to_yuv420(src, y_plane, u_plane, v_plane):
+    """Convert a BGR frame to I420 planes, BT.601 limited range like OpenCV's BGR2YUV_I420.
+    
+    Each 2x2 pixel block yields four luma samples and one chroma sample from
+    the block's average colour. Rows of blocks are converted in parallel.
+    
+    Args:
+        src (numpy.ndarray): The (H, W, 3) BGR frame; H and W must be even.
+        y_plane (numpy.ndarray): The (H, W) output luma plane.
+        u_plane (numpy.ndarray): The (H / 2, W / 2) output U plane.
+        v_plane (numpy.ndarray): The (H / 2, W / 2) output V plane.
+    """
+    height, width = y_plane.shape
+    for i in prange(height // 2):
+        row = 2 * i
+        for j in range(width // 2):
+            col = 2 * j
+            b_sum = 0
+            g_sum = 0
+            r_sum = 0
+            for dy in range(2):
+                for dx in range(2):
+                    b = np.int32(src[row + dy, col + dx, 0])
+                    g = np.int32(src[row + dy, col + dx, 1])
+                    r = np.int32(src[row + dy, col + dx, 2])
+                    y_plane[row + dy, col + dx] = ((66 * r + 129 * g + 25 * b + 128) >> 8) + 16
+                    b_sum += b
+                    g_sum += g
+                    r_sum += r
+            
+            # Chroma from the rounded block average
+            b = (b_sum + 2) >> 2
+            g = (g_sum + 2) >> 2
+            r = (r_sum + 2) >> 2
+            u_plane[i, j] = ((-38 * r - 74 * g + 112 * b + 128) >> 8) + 128
+            v_plane[i, j] = ((112 * r - 94 * g - 18 * b + 128) >> 8) + 128
\ No newline at end of file
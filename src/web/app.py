@@ -9,40 +9,114 @@ This module provides the web interface for controlling the AI Smart Car.
 import os
 import logging
 import json
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+import asyncio
+import orjson
+import socketio
+from quart import Quart, render_template, request, jsonify
+from quart.json.provider import JSONProvider
+from src.utils import metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize SocketIO
-socketio = SocketIO(cors_allowed_origins="*")
+# Joystick inputs are applied at most this often (50 Hz, the servo update rate)
+JOYSTICK_INTERVAL = 0.02
+
+class ORJSONProvider(JSONProvider):
+    """Quart JSON provider backed by orjson, which is much faster on small payloads."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+class _SocketIOJSON:
+    """orjson behind the json-module interface python-socketio calls.
+    
+    orjson output is always compact, so the separators argument is ignored.
+    """
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+# ASGI SocketIO server; its handlers run on the same asyncio loop as aiortc
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins="*", json=_SocketIOJSON)
 
 def create_app(robot_controller, camera_manager, ai_assistant):
-    """Create and configure the Flask application."""
-    app = Flask(__name__, 
+    """Create and configure the Quart application, mounted under SocketIO."""
+    app = Quart(__name__, 
                 static_folder='static',
                 template_folder='templates')
     
     # Configure app
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'ai-smart-car-secret-key')
-    
-    # Initialize SocketIO with the app
-    socketio.init_app(app)
+    app.json = ORJSONProvider(app)
     
     # Store components
     app.config['ROBOT'] = robot_controller
     app.config['CAMERA'] = camera_manager
     app.config['AI_ASSISTANT'] = ai_assistant
     
+    # Latest joystick input per type as (sid, x, y); browsers emit far faster than the
+    # servos can follow, so a background task applies only the newest input once per interval
+    joystick_latest = {}
+    app.config['JOY_LATEST'] = joystick_latest
+    
+    # Robot movement and camera position are driven by their own joystick
+    joystick_controllers = {'movement': robot_controller, 'camera': camera_manager}
+    
+    async def joystick_loop():
+        """Apply the newest pending joystick input of each type."""
+        while True:
+            await sio.sleep(JOYSTICK_INTERVAL)
+            
+            try:
+                for joystick_type, controller in joystick_controllers.items():
+                    pending = joystick_latest.pop(joystick_type, None)
+                    if pending is None:
+                        continue
+                    
+                    sid, x, y = pending
+                    with metrics.timed(metrics.JOYSTICK_EVENTS, metrics.JOYSTICK_US):
+                        result = controller.joystick_control(x, y)
+                    
+                    # Only report back when the input actually moved something
+                    if result.get('changed'):
+                        await sio.emit('joystick_response', {'status': 'ok', 'result': result}, to=sid)
+            except Exception as e:
+                logger.error("Error applying joystick input: %s", e)
+    
+    @app.before_serving
+    async def startup():
+        """Bind the camera to the serving loop and start background tasks."""
+        # aiortc peer connections live on the same loop as the web handlers
+        camera_manager.loop = asyncio.get_running_loop()
+        sio.start_background_task(joystick_loop)
+    
+    @app.after_serving
+    async def shutdown():
+        """Close peer connections while their loop is still running."""
+        await camera_manager.close_peer_connections()
+    
     # Register routes
     @app.route('/')
-    def index():
+    async def index():
         """Render the main control interface."""
-        return render_template('index.html')
+        return await render_template('index.html')
+    
+    @app.route('/api/metrics')
+    async def metrics_export():
+        """Expose pipeline metrics in the Prometheus text format."""
+        return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
     
     @app.route('/api/status')
-    def status():
+    async def status():
         """Get the status of the AI Smart Car."""
         return jsonify({
             'robot': robot_controller.get_status(),
@@ -52,28 +126,32 @@ def create_app(robot_controller, camera_manager, ai_assistant):
     
     # WebRTC routes
     @app.route('/api/webrtc/offer', methods=['POST'])
-    def webrtc_offer():
+    async def webrtc_offer():
         """Handle WebRTC offer for video streaming."""
-        offer = request.json
-        answer = camera_manager.process_offer(offer)
+        try:
+            offer = orjson.loads(await request.get_data())
+        except orjson.JSONDecodeError:
+            return jsonify({'error': 'Invalid JSON in request body'}), 400
+        with metrics.timed(metrics.OFFERS, metrics.OFFER_US):
+            answer = await camera_manager.process_offer(offer)
         return jsonify(answer)
     
     # SocketIO event handlers
-    @socketio.on('connect')
-    def handle_connect():
+    @sio.on('connect')
+    async def handle_connect(sid, environ):
         """Handle client connection."""
-        logger.info(f"Client connected: {request.sid}")
-        emit('status', {'status': 'connected'})
+        logger.info("Client connected: %s", sid)
+        await sio.emit('status', {'status': 'connected'}, to=sid)
     
-    @socketio.on('disconnect')
-    def handle_disconnect():
+    @sio.on('disconnect')
+    async def handle_disconnect(sid):
         """Handle client disconnection."""
-        logger.info(f"Client disconnected: {request.sid}")
+        logger.info("Client disconnected: %s", sid)
     
-    @socketio.on('control')
-    def handle_control(data):
+    @sio.on('control')
+    async def handle_control(sid, data):
         """Handle control commands from the client."""
-        logger.debug(f"Received control command: {data}")
+        logger.debug("Received control command: %s", data)
         command = data.get('command')
         params = data.get('params', {})
         
@@ -85,7 +163,7 @@ def create_app(robot_controller, camera_manager, ai_assistant):
             
             # Execute movement command
             result = robot_controller.move(direction, speed, duration)
-            emit('control_response', {'status': 'ok', 'result': result})
+            await sio.emit('control_response', {'status': 'ok', 'result': result}, to=sid)
         
         elif command == 'camera':
             # Extract camera parameters
@@ -94,62 +172,55 @@ def create_app(robot_controller, camera_manager, ai_assistant):
             
             # Execute camera command
             result = camera_manager.control(action, value)
-            emit('control_response', {'status': 'ok', 'result': result})
+            await sio.emit('control_response', {'status': 'ok', 'result': result}, to=sid)
         
         else:
-            emit('control_response', {'status': 'error', 'message': f'Unknown command: {command}'})
+            await sio.emit('control_response', {'status': 'error', 'message': f'Unknown command: {command}'}, to=sid)
     
-    @socketio.on('joystick')
-    def handle_joystick(data):
+    @sio.on('joystick')
+    async def handle_joystick(sid, data):
         """Handle joystick input from the client."""
-        logger.debug(f"Received joystick input: {data}")
+        logger.debug("Received joystick input: %s", data)
         joystick_type = data.get('type')
-        x = data.get('x', 0)
-        y = data.get('y', 0)
-        
-        if joystick_type == 'movement':
-            # Control robot movement
-            robot_controller.joystick_control(x, y)
-        
-        elif joystick_type == 'camera':
-            # Control camera position
-            camera_manager.joystick_control(x, y)
         
-        emit('joystick_response', {'status': 'ok'})
+        if joystick_type in joystick_controllers:
+            # Keep only the newest input; joystick_loop applies it and responds if it changed anything
+            joystick_latest[joystick_type] = (sid, data.get('x', 0), data.get('y', 0))
     
-    @socketio.on('voice')
-    def handle_voice(data):
+    @sio.on('voice')
+    async def handle_voice(sid, data):
         """Handle voice input from the client."""
-        logger.info(f"Received voice input")
+        logger.info("Received voice input")
         audio_data = data.get('audio')
         
         if audio_data:
-            # Process voice command
-            result = ai_assistant.process_voice(audio_data)
-            emit('voice_response', {'status': 'ok', 'result': result})
+            # Hand the voice command to the AI thread and await it without blocking the loop
+            result = await asyncio.wrap_future(ai_assistant.submit_voice(audio_data))
+            await sio.emit('voice_response', {'status': 'ok', 'result': result}, to=sid)
         else:
-            emit('voice_response', {'status': 'error', 'message': 'No audio data received'})
+            await sio.emit('voice_response', {'status': 'error', 'message': 'No audio data received'}, to=sid)
     
-    @socketio.on('text')
-    def handle_text(data):
+    @sio.on('text')
+    async def handle_text(sid, data):
         """Handle text input from the client."""
-        logger.info(f"Received text input: {data}")
+        logger.info("Received text input: %s", data)
         text = data.get('text')
         
         if text:
             # Process text command
             result = ai_assistant.process_text(text)
-            emit('text_response', {'status': 'ok', 'result': result})
+            await sio.emit('text_response', {'status': 'ok', 'result': result}, to=sid)
         else:
-            emit('text_response', {'status': 'error', 'message': 'No text received'})
+            await sio.emit('text_response', {'status': 'error', 'message': 'No text received'}, to=sid)
     
     # Register error handlers
     @app.errorhandler(404)
-    def page_not_found(e):
-        return render_template('404.html'), 404
+    async def page_not_found(e):
+        return await render_template('404.html'), 404
     
     @app.errorhandler(500)
-    def server_error(e):
-        return render_template('500.html'), 500
+    async def server_error(e):
+        return await render_template('500.html'), 500
     
-    return app 
\ No newline at end of file
+    # SocketIO serves /socket.io/ and passes everything else (and lifespan) to Quart
+    return socketio.ASGIApp(sio, app) 
\ No newline at end of file